@@ -1,9 +1,9 @@
 # app.py
 # Interfaz de Streamlit para el orientador de plan de estudios (check + botón)
 # Añade modo de visualización: "Pestañas" (por defecto) o "Selector rápido" (para navegar semestres largos).
+# En ambos modos sólo se renderiza el panel del semestre seleccionado.
 
 import streamlit as st
-import networkx as nx
 import time
 from courses_data import (
     fisioterapia_courses,
@@ -12,15 +12,9 @@ from courses_data import (
     credits_per_semester_enfermeria,
     calculate_semester_fisioterapia,
     calculate_semester_enfermeria,
+    fisioterapia_courses_by_semester,
+    enfermeria_courses_by_semester,
 )
-try:
-    from courses_data import (
-        fisioterapia_courses_by_semester,
-        enfermeria_courses_by_semester,
-    )
-except ImportError:
-    fisioterapia_courses_by_semester = None
-    enfermeria_courses_by_semester = None
 
 from curriculum import (
     build_curriculum_graph,
@@ -33,10 +27,44 @@ from curriculum import (
 # NOTA: créditos SIEMPRE se muestran.
 # ---------------------------
 HIDE_VALUES = True  # <-- poner False si quieres ver también costs/time para debug (no afecta créditos)
+PLAN_CACHE_SIZE = 64  # planes recientes en st.cache_data (volver a un estado previo es instantáneo)
+
+# ---------- Agrupación de asignaturas por semestre (precalculada una vez al importar courses_data) ----------
+def _by_semester(program: str):
+    return fisioterapia_courses_by_semester if program == "Fisioterapia" else enfermeria_courses_by_semester
+
+# ---------- Grafo por programa (build_curriculum_graph ya está en st.cache_resource, keyed por program) ----------
+def _get_graph(program: str):
+    return build_curriculum_graph(
+        program, fisioterapia_courses if program == "Fisioterapia" else enfermeria_courses
+    )
+
+# ---------- Asignaturas y key del editor por semestre: se preparan una vez por programa ----------
+@st.cache_resource
+def _editor_table(program: str):
+    return {
+        semester: (f"approved_editor_{program}_{semester}", tuple(semester_courses))
+        for semester, semester_courses in _by_semester(program).items()
+    }
+
+# ---------- Plan completo cacheado por (program, aprobadas, opciones) ----------
+# approved_key es una tupla ordenada (forma canónica): st.cache_data no tiene hasher propio para
+# frozenset y lo serializaría según su orden de iteración, que puede variar entre conjuntos iguales
+@st.cache_data(max_entries=PLAN_CACHE_SIZE)
+def _cached_plan(program: str, approved_key: tuple, options_key: tuple):
+    is_fisio = program == "Fisioterapia"
+    return generate_full_plan(
+        _get_graph(program),
+        list(approved_key),
+        program,
+        credits_per_semester_fisioterapia if is_fisio else credits_per_semester_enfermeria,
+        calculate_semester_fisioterapia if is_fisio else calculate_semester_enfermeria,
+        {s: dict(items) for s, items in options_key},
+    )
 
 # ---------- Estado de sesión inicial ----------
 if "approved_subjects" not in st.session_state:
-    st.session_state.approved_subjects = []
+    st.session_state.approved_subjects = frozenset()  # inmutable: se reemplaza, nunca se muta
 if "semester_options" not in st.session_state:
     st.session_state.semester_options = {}
 if "plan" not in st.session_state:
@@ -44,11 +72,19 @@ if "plan" not in st.session_state:
 if "total_cost" not in st.session_state:
     st.session_state.total_cost = 0
 if "previous_approved_subjects" not in st.session_state:
-    st.session_state.previous_approved_subjects = []
+    st.session_state.previous_approved_subjects = frozenset()
 if "last_program" not in st.session_state:
     st.session_state.last_program = None
 if "last_plan_time" not in st.session_state:
     st.session_state.last_plan_time = None  # segundos
+if "rendered_semesters" not in st.session_state:
+    st.session_state.rendered_semesters = frozenset()  # semestres con editor en el formulario
+if "plan_labels" not in st.session_state:
+    st.session_state.plan_labels = []  # derivado de plan; se recalcula sólo en update_plan
+if "plan_markdown" not in st.session_state:
+    st.session_state.plan_markdown = []  # texto de cada panel; derivado de plan en update_plan
+if "total_credits_approved" not in st.session_state:
+    st.session_state.total_credits_approved = 0  # se ajusta por delta en handle_submit
 
 st.title("Orientador de Plan de Estudios")
 
@@ -66,14 +102,12 @@ with st.spinner("Cargando datos iniciales..."):
         if program == "Fisioterapia"
         else calculate_semester_enfermeria
     )
-    courses_by_semester = (
-        fisioterapia_courses_by_semester
-        if program == "Fisioterapia"
-        else enfermeria_courses_by_semester
-    )
+    courses_by_semester = _by_semester(program)
 
-    # build_curriculum_graph recibe program como primer argumento
-    G = build_curriculum_graph(program, courses)
+    # Grafo cacheado por programa: en los reruns es un lookup O(1), no se reconstruye
+    G = _get_graph(program)
+    # créditos por asignatura como dict plano (índice construido junto con el grafo)
+    credits_map = G.graph["credits"]
 
 # Si cambió el programa, limpiar plan / opciones previas para evitar inconsistencias
 if st.session_state.last_program is None:
@@ -82,266 +116,339 @@ elif st.session_state.last_program != program:
     st.session_state.plan = []
     st.session_state.total_cost = 0
     st.session_state.semester_options = {}
-    st.session_state.approved_subjects = []
-    st.session_state.previous_approved_subjects = []
+    st.session_state.approved_subjects = frozenset()
+    st.session_state.previous_approved_subjects = frozenset()
+    st.session_state.total_credits_approved = 0
     st.session_state.last_program = program
     st.session_state.last_plan_time = None
+    st.session_state.plan_labels = []
+    st.session_state.plan_markdown = []
 
 # ---------- Helper: calcular semestre actual desde aprobado en estado ----------
 def _current_semester_from_approved():
-    try:
-        total_credits_approved = sum(
-            G.nodes[course]["credits"] for course in st.session_state.approved_subjects if course in G.nodes
-        )
-    except Exception:
-        total_credits_approved = 0
+    # total mantenido por delta en handle_submit: no se recorre approved_subjects en cada rerun
+    total_credits_approved = st.session_state.total_credits_approved
     return calculate_semester(total_credits_approved), total_credits_approved
 
 current_semester, total_credits_approved = _current_semester_from_approved()
 # Mostrar semestre actual y créditos aprobados (siempre)
 st.write(f"**Semestre actual (estimado)**: {current_semester} (Créditos aprobados: {total_credits_approved})")
 
+# ---------- Texto de un semestre del plan: depende sólo del plan, se arma una vez por plan ----------
+def _semester_markdown(semester_plan: dict) -> str:
+    # Asignaturas recomendadas con créditos (SIEMPRE): un único bloque markdown por panel
+    lines = ["**Asignaturas recomendadas:**", ""]
+    lines.extend(
+        f"- {subject} — **{credits_map.get(subject, '?')}** créditos"
+        for subject in semester_plan.get("subjects", [])
+    )
+
+    # Intersemestral recomendada (si existe), indicando sus créditos
+    if semester_plan.get("intersemestral"):
+        intername = semester_plan.get("intersemestral")
+        intercr = credits_map.get(intername, 0)
+        lines.extend(["", f"**Intersemestral recomendado por el plan:** {intername} — **{intercr}** créditos"])
+
+    # Mensajes no financieros relacionados (si HIDE_VALUES True no mostramos costos)
+    if not HIDE_VALUES:
+        lines.extend(["", f"**Costo**: ${semester_plan.get('cost', 0):,.0f}"])
+        if semester_plan.get("is_half_time"):
+            lines.extend(["", "**Media matrícula** (recomendada para optimizar costos)"])
+        if semester_plan.get("extra_credits", 0) > 0:
+            lines.extend(["", f"**Créditos extra recomendados**: {semester_plan['extra_credits']}"])
+
+    return "\n".join(lines)
+
 # ---------- Función para generar/actualizar plan (con medición de tiempo) ----------
-def update_plan():
+def update_plan() -> bool:
+    # Devuelve True si el plan se generó y guardó; False si falló (el plan vigente no se toca)
     # Recalcular semestre actual a partir del estado (por si cambió approved_subjects)
     sem, _ = _current_semester_from_approved()
-    # Inicializar opciones por semestre si faltan
-    for semester in range(sem, 11):
-        st.session_state.semester_options.setdefault(
-            semester,
-            {"is_half_time": False, "extra_credits": 0, "intersemestral": None},
-        )
-
-    # Medir tiempo de ejecución del cálculo del plan
+    # Inicializar opciones por semestre si faltan (un solo update sobre el dict del estado)
+    semester_options = st.session_state.semester_options
+    semester_options.update({
+        s: {"is_half_time": False, "extra_credits": 0, "intersemestral": None}
+        for s in range(sem, 11)
+        if s not in semester_options
+    })
+
+    # Clave del plan: aprobadas (ordenadas) + opciones por semestre en forma inmutable
+    approved_key = tuple(sorted(st.session_state.approved_subjects))
+    options_key = tuple(
+        (s, tuple(sorted(v.items()))) for s, v in sorted(semester_options.items())
+    )
+
+    # Medir tiempo de ejecución del cálculo del plan (incluye el lookup en caché);
+    # con HIDE_VALUES el tiempo nunca se muestra, así que no se mide
     try:
-        t0 = time.perf_counter()
-        plan, total_cost = generate_full_plan(
-            G,
-            st.session_state.approved_subjects,
-            program,
-            credits_per_semester,
-            calculate_semester,
-            st.session_state.semester_options,
-        )
-        t1 = time.perf_counter()
-        elapsed = t1 - t0
+        if HIDE_VALUES:
+            plan, total_cost = _cached_plan(program, approved_key, options_key)
+            elapsed = None
+        else:
+            t0 = time.perf_counter_ns()
+            plan, total_cost = _cached_plan(program, approved_key, options_key)
+            elapsed = (time.perf_counter_ns() - t0) / 1e9
     except Exception as e:
         st.error(f"Error al generar el plan: {e}")
         # No sobrescribimos el plan actual si falla
-        return
+        return False
 
     # Guardar resultados y tiempo en session_state
     st.session_state.plan = plan
+    # Etiquetas de pestañas (una entrada del plan puede repetir semestre): se derivan una vez por plan
+    st.session_state.plan_labels = [
+        f"Semestre {p['semester']}{' (repetido)' if p.get('repetition', 1) > 1 else ''}" for p in plan
+    ]
+    st.session_state.plan_markdown = [_semester_markdown(p) for p in plan]
     st.session_state.total_cost = total_cost
-    st.session_state.previous_approved_subjects = st.session_state.approved_subjects.copy()
-    st.session_state.last_plan_time = elapsed
+    # frozenset inmutable: basta con compartir la referencia (sin copia)
+    st.session_state.previous_approved_subjects = st.session_state.approved_subjects
+    if elapsed is not None:
+        st.session_state.last_plan_time = elapsed
 
     # Sincronizar recomendaciones para que aparezcan marcadas en semester_options
     for sem_entry in plan:
         sem = sem_entry.get("semester")
         if sem is None:
             continue
-        st.session_state.semester_options.setdefault(sem, {"is_half_time": False, "extra_credits": 0, "intersemestral": None})
-        st.session_state.semester_options[sem]["is_half_time"] = bool(sem_entry.get("is_half_time", False))
-        st.session_state.semester_options[sem]["extra_credits"] = int(sem_entry.get("extra_credits", 0))
-        st.session_state.semester_options[sem]["intersemestral"] = sem_entry.get("intersemestral")
+        semester_options[sem] = {
+            "is_half_time": bool(sem_entry.get("is_half_time", False)),
+            "extra_credits": int(sem_entry.get("extra_credits", 0)),
+            "intersemestral": sem_entry.get("intersemestral"),
+        }
 
     # Mostrar tiempo si no está oculto
     if not HIDE_VALUES:
         st.write(f"⏱️ Tiempo de cálculo del plan: {elapsed:.3f} segundos")
+    return True
 
-# ---------- Callback de submit: lee LOS ESTADOS REALES de los checkboxes y actualiza ----------
+# ---------- Callback de submit: lee LOS CAMBIOS REALES de cada editor y actualiza ----------
 def handle_submit():
     """
-    Lee explícitamente el estado de cada checkbox (por sus keys) y actualiza
-    st.session_state.approved_subjects con la lista actual. Luego inicializa
-    semester_options y llama a update_plan().
+    Aplica los cambios de cada st.data_editor (filas editadas, por índice) sobre
+    las aprobadas vigentes y actualiza st.session_state.approved_subjects. Luego
+    llama a update_plan(), que inicializa semester_options.
     """
-    selected = []
-    # reconstruir la lista de cursos por semestre (misma lógica usada para construir checkboxes)
-    for semester in range(1, 11):
-        if courses_by_semester:
-            semester_courses = courses_by_semester.get(semester, [])
-        else:
-            semester_courses = [course for course, info in courses.items() if info.get("semester") == semester]
+    state = st.session_state
+    previous = state.approved_subjects
+    rendered = state.rendered_semesters
+    editor_table = _editor_table(program)
+    checked = set()
+    for s in rendered:
+        key, semester_courses = editor_table.get(s, (None, ()))
+        # el editor guarda sólo los deltas: {"edited_rows": {fila: {"Aprobada": bool}}}, con la fila
+        # como entero (formato estable de st.data_editor; requirements.txt fija streamlit>=1.37)
+        edited_rows = state.get(key, {}).get("edited_rows", {}) if key else {}
         for idx, course in enumerate(semester_courses):
-            key = f"approved_chk_{program}_{semester}_{idx}_{course}"
-            # leer el estado del checkbox desde st.session_state (False por defecto si no existe)
-            if st.session_state.get(key, False):
-                selected.append(course)
+            if edited_rows.get(idx, {}).get("Aprobada", course in previous):
+                checked.add(course)
+    # semestres no renderizados (colapsados): su editor no existe, se conservan las aprobadas previas
+    kept = {c for c in previous if courses.get(c, {}).get("semester") not in rendered}
+    approved = frozenset(checked | kept)
+
+    # Submit sin cambios en las aprobadas: el plan vigente sigue siendo válido
+    if state.plan and approved == state.previous_approved_subjects:
+        return
 
-    # Guardar aprobados y asegurar semester_options inicializadas
-    st.session_state.approved_subjects = selected
-    sem_now, _ = _current_semester_from_approved()
-    for s in range(sem_now, 11):
-        st.session_state.semester_options.setdefault(s, {"is_half_time": False, "extra_credits": 0, "intersemestral": None})
+    # Ajustar el total de créditos sólo con las materias que cambiaron
+    added = approved - previous
+    removed = previous - approved
+    previous_total = state.total_credits_approved
+    new_total = previous_total + (
+        sum(credits_map.get(c, 0) for c in added) - sum(credits_map.get(c, 0) for c in removed)
+    )
 
-    # Generar plan (y sincronizar recomendaciones con UI)
-    update_plan()
+    # Guardar aprobados y generar plan (update_plan lee el estado e inicializa las semester_options
+    # que falten); si falla, se restauran aprobadas y total para que sigan en sincronía con el plan
+    state.approved_subjects = approved
+    state.total_credits_approved = new_total
+    ok = False
+    try:
+        ok = update_plan()
+    finally:
+        if not ok:
+            state.approved_subjects = previous
+            state.total_credits_approved = previous_total
 
-# ---------- Selección de asignaturas aprobadas via FORM (checkboxes) ----------
+# ---------- Selección de asignaturas aprobadas via FORM (un editor por semestre) ----------
 st.subheader("Seleccione las asignaturas aprobadas (por semestre)")
 
-# Mostrar un formulario para agrupar la selección y evitar reruns por cada checkbox
+# Sólo se crean los editores de los semestres cercanos al actual; el resto se edita a demanda
+window = range(current_semester - 1, current_semester + 3)
+hidden_semesters = [s for s in range(1, 11) if s not in window]
+extra_semesters = st.multiselect(
+    "Editar también otros semestres",
+    hidden_semesters,
+    key=f"expand_semesters_{program}",
+)
+rendered_semesters = set(window).union(extra_semesters)
+st.session_state.rendered_semesters = frozenset(rendered_semesters)
+
+# Mostrar un formulario para agrupar la selección y evitar reruns por cada cambio
+editor_table = _editor_table(program)
 with st.form("approved_form"):
     # Para cada semestre, usar un expander (cerrado por defecto salvo el semestre actual)
     for semester in range(1, 11):
-        if courses_by_semester:
-            semester_courses = courses_by_semester.get(semester, [])
-        else:
-            semester_courses = [course for course, info in courses.items() if info.get("semester") == semester]
+        semester_courses = courses_by_semester.get(semester, [])
+
+        if semester not in rendered_semesters:
+            # Resumen liviano en lugar de un editor por semestre
+            n_approved = sum(1 for c in semester_courses if c in st.session_state.approved_subjects)
+            st.caption(
+                f"Semestre {semester} — {len(semester_courses)} asignaturas ({n_approved} aprobadas). "
+                "Selecciónelo arriba para editarlo."
+            )
+            continue
 
         with st.expander(f"Semestre {semester} ({len(semester_courses)} asignaturas)", expanded=(semester == current_semester)):
-            for idx, course in enumerate(semester_courses):
-                key = f"approved_chk_{program}_{semester}_{idx}_{course}"
-                # default ahora se toma de lo guardado en session_state (para mantener persistencia)
-                default = course in st.session_state.approved_subjects
-                # cada checkbox escribe su estado en st.session_state[key]
-                st.checkbox(course, value=default, key=key)
+            key, editor_courses = editor_table[semester]
+            # Un único editor por semestre (en lugar de un checkbox por asignatura);
+            # los valores por defecto se toman de lo guardado en session_state
+            approved_now = st.session_state.approved_subjects
+            st.data_editor(
+                {
+                    "Asignatura": editor_courses,
+                    "Aprobada": [c in approved_now for c in editor_courses],
+                },
+                key=key,
+                disabled=["Asignatura"],
+                hide_index=True,
+            )
 
     # Botón del formulario: al enviarlo actualizamos los aprobados y generamos plan
-    # Usamos on_click=handle_submit para leer los estados actuales de todos los checkboxes
+    # Usamos on_click=handle_submit para leer los cambios actuales de todos los editores
     st.form_submit_button("Generar plan de estudios", on_click=handle_submit)
 
 # ---------- Mostrar plan en pestañas (si existe) ----------
-if st.session_state.plan:
-    st.subheader("Plan de estudios recomendado")
-    # Mostrar tiempo de la última generación si no ocultamos valores
-    if st.session_state.last_plan_time is not None and not HIDE_VALUES:
-        st.info(f"Último cálculo: {st.session_state.last_plan_time:.3f} s")
-
-    # Botón para recalcular plan con las opciones actuales (por si el usuario modificó media matrícula/extra/intersemestral)
-    if st.button("Recalcular plan con opciones actuales"):
-        with st.spinner("Recalculando plan..."):
-            update_plan()
-        st.success("Plan recalculado ✅")
-
-    # Preparar etiquetas y crear lista de labels (una entrada del plan puede repetir semestre)
-    labels = [f"Semestre {p['semester']}{' (repetido)' if p.get('repetition', 1) > 1 else ''}" for p in st.session_state.plan]
-
-    # MODO DE VISUALIZACIÓN: pestañas o selector rápido
-    view_mode = st.radio("Modo de visualización:", ["Pestañas", "Selector rápido"], horizontal=True)
-
-    def render_semester_panel(semester_plan: dict, i: int):
-        """
-        Renderiza el contenido de un semestre (mismos widgets/keys que antes).
-        Mantener consistencia de keys para que estado sea compartido si se usa un único modo.
-        """
-        semester = semester_plan["semester"]
-        effective_semester = min(semester, 10)
-
-        # Asegurar entry en semester_options
-        st.session_state.semester_options.setdefault(semester, {"is_half_time": False, "extra_credits": 0, "intersemestral": None})
-
-        # Media matrícula (estado viene de semester_options)
-        half_time_key = f"half_time_{program}_{semester}_{i}"
-        is_half_time = st.checkbox(
-            f"Media matrícula (máx {credits_per_semester.get(effective_semester, 0) // 2 - 1} créditos)",
-            value=st.session_state.semester_options[semester].get("is_half_time", False),
-            key=half_time_key,
-        )
-
-        # Créditos extra (slider)
-        max_extra_credits = 1 if is_half_time else max(0, 25 - credits_per_semester.get(effective_semester, 0))
-        extra_key = f"extra_credits_{program}_{semester}_{i}"
-        extra_credits = st.slider(
-            f"Créditos extra a comprar (máx {max_extra_credits})",
-            0,
-            max_extra_credits,
-            st.session_state.semester_options[semester].get("extra_credits", 0),
-            key=extra_key,
-        )
-
-        # ---- Intersemestral: calculado teniendo en cuenta materias recomendadas en ese semestre
-        temp_approved_for_inter = set(st.session_state.approved_subjects)
-        rec_subjects_for_this_sem = semester_plan.get("subjects", [])
-        temp_approved_for_inter.update(rec_subjects_for_this_sem)
-
-        intersemestral_options = get_intersemestral_options(G, tuple(temp_approved_for_inter))
-        rec_inter = semester_plan.get("intersemestral")
-        intersemestral_display_options = ["Ninguno"] + intersemestral_options
-        if rec_inter and rec_inter not in intersemestral_display_options:
-            intersemestral_display_options.append(rec_inter)
-
-        current_inter = st.session_state.semester_options[semester].get("intersemestral")
-        default_index = 0
-        if current_inter and current_inter in intersemestral_display_options:
-            default_index = intersemestral_display_options.index(current_inter)
-        inter_key = f"intersemestral_{program}_{semester}_{i}"
-        intersemestral_selected = st.selectbox(
-            f"Intersemestral (opcional)",
-            intersemestral_display_options,
-            index=default_index,
-            key=inter_key,
-        )
-
-        # Guardar las opciones del usuario (no se recalcula automáticamente)
-        st.session_state.semester_options[semester] = {
-            "is_half_time": is_half_time,
-            "extra_credits": extra_credits,
-            "intersemestral": intersemestral_selected if intersemestral_selected != "Ninguno" else None,
-        }
-
-        # ------------------ Mostrar créditos (SIEMPRE) ------------------
-        # Calcular capacidad efectiva del semestre según opciones actuales guardadas en session_state
-        base_cap = credits_per_semester.get(effective_semester, 0)
-        opts = st.session_state.semester_options.get(semester, {})
-        cap_effective = base_cap
-        if opts.get("is_half_time"):
-            cap_effective = max(0, base_cap // 2 - 1)
-        cap_effective += int(opts.get("extra_credits", 0)) if opts else 0
-
-        # Créditos que el plan recomienda en ese semestre (sujeto a que el plan haya sido recalculado)
-        credits_recommended = semester_plan.get("credits", 0)
-        inter_credits = semester_plan.get("intersemestral_credits", 0)
+# Se ejecuta como fragmento: "Recalcular" y los widgets de cada semestre sólo re-ejecutan
+# esta sección (no el formulario ni la construcción del grafo de arriba).
+@st.fragment
+def render_plan_section():
+    if st.session_state.plan:
+        st.subheader("Plan de estudios recomendado")
+        # Mostrar tiempo de la última generación si no ocultamos valores
+        if st.session_state.last_plan_time is not None and not HIDE_VALUES:
+            st.info(f"Último cálculo: {st.session_state.last_plan_time:.3f} s")
+
+        # Botón para recalcular plan con las opciones actuales (por si el usuario modificó media matrícula/extra/intersemestral)
+        if st.button("Recalcular plan con opciones actuales"):
+            with st.spinner("Recalculando plan..."):
+                update_plan()
+            st.success("Plan recalculado ✅")
+
+        # Etiquetas precalculadas en update_plan (no se reconstruyen en cada rerun)
+        labels = st.session_state.plan_labels
+
+        # MODO DE VISUALIZACIÓN: pestañas o selector rápido
+        view_mode = st.radio("Modo de visualización:", ["Pestañas", "Selector rápido"], horizontal=True)
+
+        def render_semester_panel(semester_plan: dict, i: int):
+            """
+            Renderiza el contenido de un semestre (mismos widgets/keys que antes).
+            Mantener consistencia de keys para que estado sea compartido si se usa un único modo.
+            """
+            semester = semester_plan["semester"]
+            effective_semester = min(semester, 10)
+
+            # Asegurar entry en semester_options
+            st.session_state.semester_options.setdefault(semester, {"is_half_time": False, "extra_credits": 0, "intersemestral": None})
+
+            # Media matrícula (estado viene de semester_options)
+            half_time_key = f"half_time_{program}_{semester}_{i}"
+            is_half_time = st.checkbox(
+                f"Media matrícula (máx {credits_per_semester.get(effective_semester, 0) // 2 - 1} créditos)",
+                value=st.session_state.semester_options[semester].get("is_half_time", False),
+                key=half_time_key,
+            )
+
+            # Créditos extra (slider)
+            max_extra_credits = 1 if is_half_time else max(0, 25 - credits_per_semester.get(effective_semester, 0))
+            extra_key = f"extra_credits_{program}_{semester}_{i}"
+            extra_credits = st.slider(
+                f"Créditos extra a comprar (máx {max_extra_credits})",
+                0,
+                max_extra_credits,
+                st.session_state.semester_options[semester].get("extra_credits", 0),
+                key=extra_key,
+            )
+
+            # ---- Intersemestral: calculado teniendo en cuenta materias recomendadas en ese semestre
+            temp_approved_for_inter = st.session_state.approved_subjects.union(semester_plan.get("subjects", []))
+
+            # lru_cache por (grafo, bitset de aprobadas): los reruns de las pestañas no vuelven a recorrer el grafo
+            intersemestral_options = get_intersemestral_options(G, temp_approved_for_inter)
+            rec_inter = semester_plan.get("intersemestral")
+            intersemestral_display_options = ["Ninguno"] + intersemestral_options
+            if rec_inter and rec_inter not in intersemestral_display_options:
+                intersemestral_display_options.append(rec_inter)
+
+            # índice por opción (dict) en lugar de `in` + list.index sobre la lista
+            option_index = {opt: j for j, opt in enumerate(intersemestral_display_options)}
+            current_inter = st.session_state.semester_options[semester].get("intersemestral")
+            default_index = option_index.get(current_inter, 0) if current_inter else 0
+            inter_key = f"intersemestral_{program}_{semester}_{i}"
+            intersemestral_selected = st.selectbox(
+                f"Intersemestral (opcional)",
+                intersemestral_display_options,
+                index=default_index,
+                key=inter_key,
+            )
+
+            # Guardar las opciones del usuario (no se recalcula automáticamente)
+            st.session_state.semester_options[semester] = {
+                "is_half_time": is_half_time,
+                "extra_credits": extra_credits,
+                "intersemestral": intersemestral_selected if intersemestral_selected != "Ninguno" else None,
+            }
+
+            # Asignaturas, intersemestral y costo: texto precalculado en update_plan
+            st.markdown(st.session_state.plan_markdown[i])
+
+        # Mostrar según modo elegido: en ambos modos sólo se instancian los widgets del semestre visible
+        # (st.tabs construiría los paneles de todos los semestres en cada rerun)
+        if view_mode == "Pestañas":
+            idx = st.radio(
+                "Semestre",
+                range(len(labels)),
+                format_func=labels.__getitem__,
+                horizontal=True,
+                label_visibility="collapsed",
+            )
+        else:  # Selector rápido
+            idx = st.selectbox("Selecciona semestre a visualizar:", range(len(labels)), format_func=labels.__getitem__)
+        render_semester_panel(st.session_state.plan[idx], idx)
 
+        # ------------------ Resumen de créditos (SIEMPRE): una sola tabla para todo el plan ------------------
+        # Se renderiza después de los paneles para reflejar las opciones recién editadas en esta ejecución.
+        summary_rows = []
+        for label, semester_plan in zip(labels, st.session_state.plan):
+            semester = semester_plan["semester"]
+            base_cap = credits_per_semester.get(min(semester, 10), 0)
+            opts = st.session_state.semester_options.get(semester, {})
+            cap_effective = base_cap
+            if opts.get("is_half_time"):
+                cap_effective = max(0, base_cap // 2 - 1)
+            cap_effective += int(opts.get("extra_credits", 0)) if opts else 0
+
+            # Créditos que el plan recomienda en ese semestre (sujeto a que el plan haya sido recalculado)
+            credits_recommended = semester_plan.get("credits", 0)
+            inter_credits = semester_plan.get("intersemestral_credits", 0) or 0
+            summary_rows.append({
+                "Semestre": label,
+                "Créditos disponibles": cap_effective,
+                "Créditos recomendados": credits_recommended,
+                "Intersemestral": semester_plan.get("intersemestral") or "—",
+                "Créditos intersemestrales": inter_credits,
+                "Créditos sin usar": max(0, cap_effective - (credits_recommended + inter_credits)),
+            })
         st.markdown("**Resumen de créditos (ajustables con opciones actuales):**")
-        st.write(f"- Créditos disponibles en el semestre: **{cap_effective}** créditos")
-        st.write(f"- Créditos recomendados por el plan en este semestre: **{credits_recommended}** créditos")
-        if inter_credits:
-            st.write(f"- Créditos intersemestrales recomendados (serán considerados como aprobados si se activan): **{inter_credits}** créditos")
-        # mostrar gap si cabe
-        gap = max(0, cap_effective - (credits_recommended + (inter_credits if inter_credits else 0)))
-        st.write(f"- Créditos sin usar: **{gap}** créditos")
-
-        # Mostrar asignaturas recomendadas con créditos (SIEMPRE)
-        st.write("**Asignaturas recomendadas:**")
-        for subject in semester_plan.get("subjects", []):
-            credits = G.nodes[subject]["credits"] if subject in G.nodes else "?"
-            st.write(f"- {subject} — **{credits}** créditos")
-
-        # Mostrar la intersemestral recomendada (si existe), indicando sus créditos
-        if semester_plan.get("intersemestral"):
-            intername = semester_plan.get("intersemestral")
-            intercr = G.nodes[intername]["credits"] if intername in G.nodes else 0
-            st.write(f"**Intersemestral recomendado por el plan:** {intername} — **{intercr}** créditos")
-
-        # Mensajes no financieros relacionados (si HIDE_VALUES True no mostramos costos)
+        st.dataframe(summary_rows, hide_index=True)
+
+        # No mostramos costo total si HIDE_VALUES True
         if not HIDE_VALUES:
-            st.write(f"**Costo**: ${semester_plan.get('cost', 0):,.0f}")
-            if semester_plan.get("is_half_time"):
-                st.write("**Media matrícula** (recomendada para optimizar costos)")
-            if semester_plan.get("extra_credits", 0) > 0:
-                st.write(f"**Créditos extra recomendados**: {semester_plan['extra_credits']}")
-
-    # Mostrar según modo elegido
-    if view_mode == "Pestañas":
-        # Crear pestañas
-        tabs = st.tabs(labels)
-        for i, (tab, semester_plan) in enumerate(zip(tabs, st.session_state.plan)):
-            with tab:
-                render_semester_panel(semester_plan, i)
-
-    else:  # Selector rápido
-        # Construir opciones: label -> index
-        options = {label: idx for idx, label in enumerate(labels)}
-        selected_label = st.selectbox("Selecciona semestre a visualizar:", list(options.keys()))
-        idx = options[selected_label]
-        # Renderizamos sólo la entrada seleccionada
-        render_semester_panel(st.session_state.plan[idx], idx)
+            st.write(f"**Costo total estimado**: ${st.session_state.total_cost:,.0f}")
+    else:
+        st.info("No hay plan generado todavía. Seleccione asignaturas aprobadas y pulse 'Generar plan de estudios'.")
 
-    # No mostramos costo total si HIDE_VALUES True
-    if not HIDE_VALUES:
-        st.write(f"**Costo total estimado**: ${st.session_state.total_cost:,.0f}")
-else:
-    st.info("No hay plan generado todavía. Seleccione asignaturas aprobadas y pulse 'Generar plan de estudios'.")
+
+render_plan_section()
@@ -1,6 +1,8 @@
 # courses_data.py
 # Datos de los cursos y funciones para calcular el semestre
 
+from bisect import bisect_left
+
 # -------------------
 # Fisioterapia
 # -------------------
@@ -120,15 +122,16 @@ enfermeria_courses = {
 # -------------------
 # Precomputar asignaturas por semestre
 # -------------------
-fisioterapia_courses_by_semester = {}
-enfermeria_courses_by_semester = {}
-for semester in range(1, 11):
-    fisioterapia_courses_by_semester[semester] = [
-        course for course, info in fisioterapia_courses.items() if info.get("semester") == semester
-    ]
-    enfermeria_courses_by_semester[semester] = [
-        course for course, info in enfermeria_courses.items() if info.get("semester") == semester
-    ]
+# Una sola pasada por programa (semestres 1..10 siempre presentes)
+def _bucket_by_semester(courses: dict) -> dict:
+    buckets = {semester: [] for semester in range(1, 11)}
+    for course, info in courses.items():
+        buckets.setdefault(info.get("semester"), []).append(course)
+    return buckets
+
+
+fisioterapia_courses_by_semester = _bucket_by_semester(fisioterapia_courses)
+enfermeria_courses_by_semester = _bucket_by_semester(enfermeria_courses)
 
 # -------------------
 # Créditos por semestre previstos
@@ -139,47 +142,19 @@ credits_per_semester_enfermeria = {1: 18, 2: 20, 3: 21, 4: 22, 5: 21, 6: 19, 7:
 # -------------------
 # Funciones para calcular semestre actual según créditos aprobados
 # -------------------
+# Máximo de créditos aprobados que corresponde a cada semestre 1..9 (por encima: semestre 10)
+SEMESTER_THRESHOLDS_FISIOTERAPIA = (13, 31, 50, 68, 86, 105, 127, 144, 159)
+SEMESTER_THRESHOLDS_ENFERMERIA = (12, 32, 53, 75, 96, 115, 135, 151, 168)
+
+
+def _semester_from_thresholds(credits: int, thresholds: tuple) -> int:
+    # primer umbral >= credits (búsqueda binaria); sin umbral: len(thresholds) + 1
+    return bisect_left(thresholds, credits) + 1
+
+
 def calculate_semester_fisioterapia(credits: int) -> int:
-    if credits <= 13:
-        return 1
-    elif credits <= 31:
-        return 2
-    elif credits <= 50:
-        return 3
-    elif credits <= 68:
-        return 4
-    elif credits <= 86:
-        return 5
-    elif credits <= 105:
-        return 6
-    elif credits <= 127:
-        return 7
-    elif credits <= 144:
-        return 8
-    elif credits <= 159:
-        return 9
-    else:
-        return 10
+    return _semester_from_thresholds(credits, SEMESTER_THRESHOLDS_FISIOTERAPIA)
 
 
 def calculate_semester_enfermeria(credits: int) -> int:
-    if credits <= 12:
-        return 1
-    elif credits <= 32:
-        return 2
-    elif credits <= 53:
-        return 3
-    elif credits <= 75:
-        return 4
-    elif credits <= 96:
-        return 5
-    elif credits <= 115:
-        return 6
-    elif credits <= 135:
-        return 7
-    elif credits <= 151:
-        return 8
-    elif credits <= 168:
-        return 9
-    else:
-        return 10
+    return _semester_from_thresholds(credits, SEMESTER_THRESHOLDS_ENFERMERIA)
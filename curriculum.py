@@ -5,9 +5,9 @@
 
 import networkx as nx
 import streamlit as st
-import gc
+import functools
 import math
-from typing import Iterable, List, Tuple, Dict, Any, Set
+from typing import Iterable, List, Tuple, Dict, Any, Set, FrozenSet
 
 # -------------------------
 # Parámetros ajustables
@@ -19,6 +19,15 @@ TRANSITIVE_WEIGHT = 2.0              # peso que se suma al score por unlock tran
 MAX_TRANS_DEPTH = 6                  # profundidad máxima para exploración transitive unlock
 WEIGHT_BY_CREDITS = True             # usar créditos en vez de contar materias en unlock score
 
+# Créditos requeridos para graduarse, por programa (cualquier otro programa: 189)
+TOTAL_CREDITS_REQUIRED = {"Fisioterapia": 180, "Enfermería": 189}
+
+# Parámetros económicos (costos por semestre / penalidad por crédito sin usar)
+FULL_COST = 10000000
+HALF_COST = 5000000
+INTER_COST = 1500000
+GAP_PENALTY_PER_CREDIT = 800000
+
 # -------------------------
 # Helper: nombre mandatorio
 # -------------------------
@@ -46,9 +55,60 @@ def build_curriculum_graph(program: str, _courses: Dict[str, Dict[str, Any]]) ->
         for coreq in info.get("corerequisites", []):
             G.add_edge(coreq, course, type="corequisite")
     G.graph["program"] = program
+    # Índice plano (sin NetworkX) para los caminos calientes: dicts y frozensets por materia
+    G.graph["nodes"] = tuple(G.nodes)
+    G.graph["credits"] = {n: G.nodes[n].get("credits", 0) for n in G.nodes}
+    G.graph["semester"] = {n: G.nodes[n].get("semester", 99) for n in G.nodes}
+    # Clave de relleno (más créditos primero, luego semestre nominal), fija por materia
+    G.graph["fill_key"] = {n: (-G.graph["credits"][n], G.graph["semester"][n]) for n in G.nodes}
+    # Materias mandatorias (Inglés / Core Currículum en ambas grafías): se clasifican una sola vez
+    G.graph["mandatory"] = frozenset(n for n in G.nodes if is_mandatory_name(n))
+    # Adyacencia por tipo de arista: frozensets estáticos (subset checks en C)
+    G.graph["prereqs"] = {
+        n: frozenset(p for p in G.predecessors(n) if G[p][n].get("type") != "corequisite") for n in G.nodes
+    }
+    G.graph["coreqs"] = {
+        n: frozenset(p for p in G.predecessors(n) if G[p][n].get("type") == "corequisite") for n in G.nodes
+    }
+    G.graph["requires"] = {n: frozenset(G.predecessors(n)) for n in G.nodes}
+    # Grafo inverso: materias que dependen (prereq o coreq) de cada materia
+    G.graph["dependents"] = {n: tuple(G.successors(n)) for n in G.nodes}
+    G.graph["topo"] = tuple(nx.topological_sort(G))
+    # Orden topológico recortado por semestre nominal: topo_upto[k] = materias con semestre <= k
+    # (por encima del semestre máximo vale el orden completo)
+    max_semester = max(G.graph["semester"].values(), default=0)
+    G.graph["topo_upto"] = {
+        k: tuple(n for n in G.graph["topo"] if G.graph["semester"][n] <= k) for k in range(max_semester)
+    }
+    # Bitsets: cada materia ocupa un bit; los requisitos de una materia son el OR de sus bits
+    bit = {n: 1 << i for i, n in enumerate(G.nodes)}
+    G.graph["bit"] = bit
+    G.graph["requires_mask"] = {n: sum(bit[p] for p in preds) for n, preds in G.graph["requires"].items()}
+    prereq_mask = dict.fromkeys(G.nodes, 0)
+    coreq_mask = dict.fromkeys(G.nodes, 0)
+    for p, c, edge_type in G.edges(data="type"):
+        if edge_type == "corequisite":
+            coreq_mask[c] |= bit[p]
+        else:
+            prereq_mask[c] |= bit[p]
+    G.graph["prereq_mask"] = prereq_mask
+    G.graph["coreq_mask"] = coreq_mask
+    # Materias que pueden cursarse en intersemestral (en el orden de los nodos)
+    G.graph["intersemestral_candidates"] = tuple(
+        n for n in G.nodes if n.startswith("Inglés") or n == "Precálculo" or ("Inglés" in n)
+    )
     return G
 
 
+def _approved_mask(_G: nx.DiGraph, approved_subjects: Iterable[str]) -> int:
+    """Bitset (int) de las materias aprobadas que existen en el grafo."""
+    bit = _G.graph["bit"]
+    mask = 0
+    for c in approved_subjects:
+        mask |= bit.get(c, 0)
+    return mask
+
+
 def _normalize_approved(approved_subjects: Iterable[str]) -> Tuple[str, ...]:
     if approved_subjects is None:
         return tuple()
@@ -60,64 +120,83 @@ def _normalize_approved(approved_subjects: Iterable[str]) -> Tuple[str, ...]:
 # --------------------------------------------------
 # Disponibilidad e intersemestral
 # --------------------------------------------------
-def get_available_subjects(_G: nx.DiGraph, approved_subjects: Tuple[str, ...], current_semester: int) -> List[str]:
+def get_available_subjects(_G: nx.DiGraph, approved_subjects: Iterable[str], current_semester: int) -> List[str]:
     """
     Devuelve la lista de asignaturas disponibles (cumplen prereqs y coreqs) hasta el semestre current_semester+1.
     """
-    approved = set(approved_subjects)
-    available: List[str] = []
-
-    for course in _G.nodes:
-        if course in approved:
+    return list(_available_subjects_cached(_G, _approved_mask(_G, approved_subjects), current_semester))
+
+
+@functools.lru_cache(maxsize=2048)
+def _available_scan(_G: nx.DiGraph, approved_mask: int, current_semester: int) -> Tuple[int, Tuple[str, ...]]:
+    # Clave = (identidad del grafo, bitset aprobado, semestre): el lookahead del greedy repite
+    # los mismos conjuntos candidato muchas veces dentro de un plan y entre planes.
+    # Devuelve (bitset disponible, nombres ordenados) para no reconstruir uno a partir del otro.
+    bit = _G.graph["bit"]
+    prereq_mask = _G.graph["prereq_mask"]
+    coreq_mask = _G.graph["coreq_mask"]
+    semester_of = _G.graph["semester"]
+    mandatory = _G.graph["mandatory"]
+    available_mask = 0
+
+    # Recorrido en orden topológico: todo corequisito se evalúa antes que la materia que lo exige.
+    # Sólo se recorren materias dentro de la ventana (semestre <= current_semester + 1).
+    for course in _G.graph["topo_upto"].get(current_semester + 1, _G.graph["topo"]):
+        course_bit = bit[course]
+        if course_bit & approved_mask:
+            continue
+        # prereqs: todos aprobados; coreqs: aprobados o ya disponibles
+        if prereq_mask[course] & ~approved_mask:
+            continue
+        if coreq_mask[course] & ~(approved_mask | available_mask):
             continue
+        available_mask |= course_bit
+
+    # Salida en el orden de los nodos; mandatorias al frente (en orden inverso) para priorizarlas
+    mandatory_available: List[str] = []
+    other_available: List[str] = []
+    for course in _G.graph["nodes"]:
+        if bit[course] & available_mask:
+            if course in mandatory and semester_of[course] <= current_semester:
+                mandatory_available.append(course)
+            else:
+                other_available.append(course)
 
-        preds = list(_G.predecessors(course))
-        prereqs = [p for p in preds if _G[p][course].get("type") != "corequisite"]
-        coreqs = [p for p in preds if _G[p][course].get("type") == "corequisite"]
+    mandatory_available.reverse()
+    return available_mask, tuple(mandatory_available + other_available)
 
-        ok_prereqs = True
-        for pr in prereqs:
-            if pr not in approved:
-                ok_prereqs = False
-                break
-        if not ok_prereqs:
-            continue
 
-        ok_coreqs = True
-        for cr in coreqs:
-            if (cr not in approved) and (cr not in available):
-                ok_coreqs = False
-                break
-        if not ok_coreqs:
-            continue
+def _available_subjects_cached(_G: nx.DiGraph, approved_mask: int, current_semester: int) -> Tuple[str, ...]:
+    return _available_scan(_G, approved_mask, current_semester)[1]
 
-        course_sem = _G.nodes[course].get("semester", 99)
-        # mandar mandatorias al frente para priorizarlas
-        if is_mandatory_name(course) and course_sem <= current_semester:
-            available.insert(0, course)
-        elif course_sem <= current_semester + 1:
-            available.append(course)
 
-    return available
+def _available_mask_cached(_G: nx.DiGraph, approved_mask: int, current_semester: int) -> int:
+    # Bitset del mismo recorrido (para el lookahead del greedy)
+    return _available_scan(_G, approved_mask, current_semester)[0]
 
 
-def get_intersemestral_options(_G: nx.DiGraph, approved_subjects: Tuple[str, ...]) -> List[str]:
+def get_intersemestral_options(_G: nx.DiGraph, approved_subjects: Iterable[str]) -> List[str]:
     """
     Devuelve las materias susceptibles de ser cursadas en intersemestral
     (por ahora: materias tipo Inglés y Precálculo) si se cumplen prerequisitos.
     """
-    approved = set(approved_subjects)
+    return list(_intersemestral_options_cached(_G, _approved_mask(_G, approved_subjects)))
+
+
+@functools.lru_cache(maxsize=128)
+def _intersemestral_options_cached(_G: nx.DiGraph, approved_mask: int) -> Tuple[str, ...]:
+    # Clave = (identidad del grafo, bitset aprobado): el grafo debe venir de
+    # build_curriculum_graph (st.cache_resource) para que su identidad sea estable.
+    bit = _G.graph["bit"]
+    requires_mask = _G.graph["requires_mask"]
     intersemestral = []
-    for course in _G.nodes:
-        name_ok = course.startswith("Inglés") or course == "Precálculo" or ("Inglés" in course)
-        if not name_ok:
+    for course in _G.graph["intersemestral_candidates"]:
+        if bit[course] & approved_mask:
             continue
-        if course in approved:
-            continue
-        preds = list(_G.predecessors(course))
-        if all(pr in approved for pr in preds):
+        # elegible si ningún requisito queda fuera del conjunto aprobado
+        if not (requires_mask[course] & ~approved_mask):
             intersemestral.append(course)
-    return intersemestral
+    return tuple(intersemestral)
 
 
 # --------------------------------------------------
@@ -125,11 +204,9 @@ def get_intersemestral_options(_G: nx.DiGraph, approved_subjects: Tuple[str, ...
 # --------------------------------------------------
 def _collect_coreqs_to_take(G: nx.DiGraph, course: str, approved_set: Set[str], available_this_sem: Set[str]) -> Set[str]:
     coreqs = set()
-    preds = list(G.predecessors(course))
-    for p in preds:
-        if G[p][course].get("type") == "corequisite":
-            if p not in approved_set and p in available_this_sem:
-                coreqs.add(p)
+    for p in G.graph["coreqs"][course]:
+        if p not in approved_set and p in available_this_sem:
+            coreqs.add(p)
     return coreqs
 
 
@@ -143,24 +220,32 @@ def _pack_additional_courses(G: nx.DiGraph, approved_set: Set[str], selected: Li
         return selected, 0
 
     added = 0
+    credits_map = G.graph["credits"]
+    semester_of = G.graph["semester"]
+    mandatory = G.graph["mandatory"]
+    # conjuntos para membresía O(1) (selected se mantiene como lista para preservar el orden)
+    selected_set = set(selected)
+    approved_with_selected = approved_set.union(selected_set)
+    available_lookup = set(available_set)
     pack_candidates = []
     for c in available_set:
-        if c in selected or c in approved_set:
+        if c in selected_set or c in approved_set:
             continue
-        coreqs = _collect_coreqs_to_take(G, c, approved_set.union(selected), set(available_set))
+        coreqs = _collect_coreqs_to_take(G, c, approved_with_selected, available_lookup)
         need_set = {c} | coreqs
-        need_credits = sum(G.nodes[n].get("credits", 0) for n in need_set)
+        need_credits = sum(credits_map[n] for n in need_set)
         if need_credits <= remaining:
-            is_mand = 1 if is_mandatory_name(c) else 0
-            is_nominal = 1 if G.nodes[c].get("semester") == current_sem else 0
+            is_mand = 1 if c in mandatory else 0
+            is_nominal = 1 if semester_of[c] == current_sem else 0
             pack_candidates.append((is_mand, is_nominal, need_credits, c, need_set))
     # ordenar: mandatorias primero, luego nominales, luego mayor créditos, luego semestre asc
-    pack_candidates.sort(key=lambda x: (-x[0], -x[1], -x[2], G.nodes[x[3]].get("semester", 99)))
+    pack_candidates.sort(key=lambda x: (-x[0], -x[1], -x[2], semester_of[x[3]]))
     for is_mand, is_nom, need_credits, c, need_set in pack_candidates:
         if need_credits <= remaining:
             for n in need_set:
-                if n not in selected:
+                if n not in selected_set:
                     selected.append(n)
+                    selected_set.add(n)
             remaining -= need_credits
             added += need_credits
         if remaining <= 0:
@@ -169,8 +254,7 @@ def _pack_additional_courses(G: nx.DiGraph, approved_set: Set[str], selected: Li
 
 
 def _estimate_remaining_semesters_simulation(
-    G: nx.DiGraph,
-    approved_subjects: Iterable[str],
+    approved_credits: int,
     total_credits_required: int,
     credits_per_semester: Dict[int, int],
     semester_options: Dict[int, Dict[str, Any]],
@@ -180,9 +264,9 @@ def _estimate_remaining_semesters_simulation(
     """
     Simulación rápida que resta créditos por semestre usando capacities (incluye extra_credits).
     Devuelve número de semestres necesarios desde start_semester (no cuenta el semestre actual).
+    `approved_credits` es el total ya sumado por el llamador (se mantiene incrementalmente).
     """
-    approved_sum = sum(G.nodes[c]["credits"] for c in approved_subjects if c in G.nodes)
-    remaining = max(0, total_credits_required - approved_sum)
+    remaining = max(0, total_credits_required - approved_credits)
     if remaining == 0:
         return 0
 
@@ -223,30 +307,33 @@ def _transitive_unlock_score(G: nx.DiGraph, candidate: str, approved_set: Set[st
     # agregar candidate y sus coreqs disponibles (optimista)
     sim_approved.add(candidate)
     sim_queue.append(candidate)
-    for p in G.predecessors(candidate):
-        if G[p][candidate].get("type") == "corequisite":
-            if p in available_set:
-                sim_approved.add(p)
-                sim_queue.append(p)
-
+    for p in G.graph["coreqs"][candidate]:
+        if p in available_set:
+            sim_approved.add(p)
+            sim_queue.append(p)
+
+    credits_map = G.graph["credits"]
+    prereqs_of = G.graph["prereqs"]
+    coreqs_of = G.graph["coreqs"]
+    dependents = G.graph["dependents"]
     score = 0.0
     visited_new = set()
     depth = 1
 
-    # BFS conceptual: en cada paso encontramos nodos cuyos prereqs (no-coreqs) están satisfechos
+    # BFS conceptual: en cada paso encontramos nodos cuyos prereqs (no-coreqs) están satisfechos.
+    # Estilo Kahn: tras el primer nivel sólo pueden desbloquearse dependientes de lo recién aprobado.
+    frontier: Iterable[str] = G.graph["nodes"]
     while depth <= max_depth:
         newly_unlocked = set()
-        for node in G.nodes:
+        for node in frontier:
             if node in sim_approved or node in visited_new:
                 continue
-            prereqs = [p for p in G.predecessors(node) if G[p][node].get("type") != "corequisite"]
-            coreqs = [p for p in G.predecessors(node) if G[p][node].get("type") == "corequisite"]
             # prereqs todos satisfechos?
-            if prereqs and not all(pr in sim_approved for pr in prereqs):
+            if not prereqs_of[node] <= sim_approved:
                 continue
             # coreqs: solo asumimos optimista si están aprobados o en available_set (el candidato podría abrirlos)
             coreqs_ok = True
-            for cr in coreqs:
+            for cr in coreqs_of[node]:
                 if cr not in sim_approved and cr not in available_set:
                     coreqs_ok = False
                     break
@@ -261,9 +348,10 @@ def _transitive_unlock_score(G: nx.DiGraph, candidate: str, approved_set: Set[st
             sim_approved.add(n)
             visited_new.add(n)
             if weight_by_credits:
-                score += G.nodes[n].get("credits", 0) / (depth ** 1.2)
+                score += credits_map[n] / (depth ** 1.2)
             else:
                 score += 1.0 / (depth ** 1.2)
+        frontier = {d for n in newly_unlocked for d in dependents[n]}
 
         depth += 1
 
@@ -275,7 +363,7 @@ def _transitive_unlock_score(G: nx.DiGraph, candidate: str, approved_set: Set[st
 # --------------------------------------------------
 def greedy_select_with_lookahead(
     G: nx.DiGraph,
-    approved: List[str],
+    approved: Iterable[str],
     available_subjects: List[str],
     current_sem: int,
     credits_limit: int,
@@ -286,59 +374,86 @@ def greedy_select_with_lookahead(
     Selección greedy con lookahead y puntuación que incluye unlock transitivo.
     Devuelve (selected_subjects, total_credits).
     """
+    selected, total_credits = _greedy_select_cached(
+        G, frozenset(approved), tuple(available_subjects), current_sem, credits_limit, lookahead, favor_fill
+    )
+    return list(selected), total_credits
+
+
+@functools.lru_cache(maxsize=512)
+def _greedy_select_cached(
+    G: nx.DiGraph,
+    approved: FrozenSet[str],
+    available_subjects: Tuple[str, ...],
+    current_sem: int,
+    credits_limit: int,
+    lookahead: int,
+    favor_fill: bool,
+) -> Tuple[Tuple[str, ...], int]:
+    # Misma clave de identidad de grafo que _intersemestral_options_cached: al cambiar las
+    # opciones de un semestre, los semestres previos del plan repiten exactamente estas llamadas.
     approved_set = set(approved)
     available_set = list(available_subjects)
+    credits_map = G.graph["credits"]
+    semester_of = G.graph["semester"]
+    mandatory = G.graph["mandatory"]
 
     # --- Si todas las materias nominales disponibles caben, devolverlas de inmediato ---
-    nominal_available = [c for c in available_set if G.nodes[c].get("semester") == current_sem]
+    nominal_available = [c for c in available_set if semester_of[c] == current_sem]
     if nominal_available:
         nominal_full_set = set()
         for c in nominal_available:
             coreqs = _collect_coreqs_to_take(G, c, approved_set, set(available_set))
             nominal_full_set.add(c)
             nominal_full_set.update(coreqs)
-        nominal_total_credits = sum(G.nodes[n].get("credits", 0) for n in nominal_full_set)
+        nominal_total_credits = sum(credits_map[n] for n in nominal_full_set)
         if nominal_total_credits <= credits_limit:
-            return list(nominal_full_set), nominal_total_credits
+            return tuple(nominal_full_set), nominal_total_credits
 
     selected: List[str] = []
+    selected_set: Set[str] = set()
+    available_lookup = set(available_set)
     total_credits = 0
 
-    baseline_next = set(get_available_subjects(G, tuple(approved_set), current_sem + 1))
-    baseline_next2 = set(get_available_subjects(G, tuple(approved_set.union(baseline_next)), current_sem + 2)) if lookahead >= 2 else set()
+    # Lookahead sobre bitsets (ids enteros por materia): uniones = OR, diferencias = AND NOT, conteo = bit_count
+    approved_mask = _approved_mask(G, approved_set)
+    baseline_next = _available_mask_cached(G, approved_mask, current_sem + 1)
+    baseline_next2 = _available_mask_cached(G, approved_mask | baseline_next, current_sem + 2) if lookahead >= 2 else 0
 
     iterations_guard = 0
     while total_credits < credits_limit and iterations_guard < 500:
         iterations_guard += 1
-        candidates = [c for c in available_set if c not in selected]
+        candidates = [c for c in available_set if c not in selected_set]
         if not candidates:
             break
+        approved_with_selected = approved_set | selected_set
+        approved_with_selected_mask = approved_mask | _approved_mask(G, selected_set)
 
         best_score = -float('inf')
         best_choice_full_set: Set[str] = set()
         best_choice_credits = 0
 
         for cand in candidates:
-            coreqs = _collect_coreqs_to_take(G, cand, approved_set.union(selected), set(available_set))
+            coreqs = _collect_coreqs_to_take(G, cand, approved_with_selected, available_lookup)
             need_set = {cand} | coreqs
-            need_credits = sum(G.nodes[n].get("credits", 0) for n in need_set)
+            need_credits = sum(credits_map[n] for n in need_set)
             if total_credits + need_credits > credits_limit:
                 continue
 
-            temp_approved = set(approved_set) | set(selected) | need_set
-            next_avail = set(get_available_subjects(G, tuple(temp_approved), current_sem + 1))
-            next2_avail = set(get_available_subjects(G, tuple(temp_approved.union(next_avail)), current_sem + 2)) if lookahead >= 2 else set()
+            temp_mask = approved_with_selected_mask | _approved_mask(G, need_set)
+            next_avail = _available_mask_cached(G, temp_mask, current_sem + 1)
+            next2_avail = _available_mask_cached(G, temp_mask | next_avail, current_sem + 2) if lookahead >= 2 else 0
 
-            inc1 = len(next_avail - baseline_next)
-            inc2 = len(next2_avail - baseline_next2) if lookahead >= 2 else 0
+            inc1 = (next_avail & ~baseline_next).bit_count()
+            inc2 = (next2_avail & ~baseline_next2).bit_count() if lookahead >= 2 else 0
             benefit = inc1 * 2 + inc2
 
             # priorizaciones
-            mand_bonus = 0.5 * need_credits if is_mandatory_name(cand) else 0.0
-            nominal_bonus = 0.25 * need_credits if G.nodes[cand].get("semester") == current_sem else 0.0
+            mand_bonus = 0.5 * need_credits if cand in mandatory else 0.0
+            nominal_bonus = 0.25 * need_credits if semester_of[cand] == current_sem else 0.0
 
             # transitive unlock score (ponderado por créditos)
-            unlock_score = _transitive_unlock_score(G, cand, approved_set.union(selected), set(available_set), max_depth=MAX_TRANS_DEPTH, weight_by_credits=WEIGHT_BY_CREDITS)
+            unlock_score = _transitive_unlock_score(G, cand, approved_with_selected, available_lookup, max_depth=MAX_TRANS_DEPTH, weight_by_credits=WEIGHT_BY_CREDITS)
 
             if favor_fill:
                 # Score: priorizar créditos (llenar), luego desbloqueo inmediato, añadir unlock_score y bonificaciones
@@ -353,22 +468,28 @@ def greedy_select_with_lookahead(
 
         if not best_choice_full_set:
             remaining = credits_limit - total_credits
-            optional = sorted([c for c in candidates if G.nodes[c].get("credits", 0) <= remaining], key=lambda s: (-G.nodes[s].get("credits", 0), G.nodes[s].get("semester", 99)))
-            if not optional:
+            # sólo se usa la mejor opcional: un recorrido lineal (min) en lugar de ordenar toda la lista
+            pick = min(
+                (c for c in candidates if credits_map[c] <= remaining),
+                key=G.graph["fill_key"].__getitem__,
+                default=None,
+            )
+            if pick is None:
                 break
-            pick = optional[0]
-            coreqs = _collect_coreqs_to_take(G, pick, approved_set.union(selected), set(available_set))
+            coreqs = _collect_coreqs_to_take(G, pick, approved_with_selected, available_lookup)
             pick_set = {pick} | coreqs
-            pick_credits = sum(G.nodes[n].get("credits", 0) for n in pick_set)
+            pick_credits = sum(credits_map[n] for n in pick_set)
             if total_credits + pick_credits > credits_limit:
                 break
-            selected.extend([x for x in pick_set if x not in selected])
+            selected.extend([x for x in pick_set if x not in selected_set])
+            selected_set.update(pick_set)
             total_credits += pick_credits
             continue
 
         for n in best_choice_full_set:
-            if n not in selected:
+            if n not in selected_set:
                 selected.append(n)
+                selected_set.add(n)
         total_credits += best_choice_credits
 
     # packing interno para llenar restantes
@@ -377,7 +498,7 @@ def greedy_select_with_lookahead(
         selected, added = _pack_additional_courses(G, approved_set, selected, available_set, remaining, current_sem)
         total_credits += added
 
-    return selected, total_credits
+    return tuple(selected), total_credits
 
 
 # --------------------------------------------------
@@ -399,43 +520,40 @@ def generate_full_plan(
     Nota: intersemestrales cuentan como aprobados para avance, PERO no consumen la capacidad del semestre.
     """
     approved = list(approved_subjects) if approved_subjects is not None else []
-    total_credits_approved = sum(_G.nodes[c]["credits"] for c in approved if c in _G.nodes)
+    credits_map = _G.graph["credits"]
+    total_credits_approved = sum(credits_map[c] for c in approved if c in credits_map)
     current_semester = _calculate_semester(total_credits_approved)
-    total_credits_required = 180 if program == "Fisioterapia" else 189
+    total_credits_required = TOTAL_CREDITS_REQUIRED.get(program, 189)
 
     if total_credits_approved >= total_credits_required:
         return [], 0
 
     lookahead = MAX_LOOKAHEAD
     plan = []
-    approved_local = list(approved)
+    approved_local = set(approved)  # conjunto: membresía O(1) y sin copias por iteración
+    # créditos de approved_local, mantenidos por delta (para la estimación de semestres restantes)
+    approved_local_credits = sum(credits_map[c] for c in approved_local if c in credits_map)
+    # y su bitset, también por delta: clave directa de los cachés de disponibilidad/intersemestral
+    approved_local_mask = _approved_mask(_G, approved_local)
     total_credits_local = total_credits_approved
     current_sem = current_semester
     total_cost = 0
     semester_counts = {}
     max_iterations = 40
 
-    # parámetros económicos
-    FULL_COST = 10000000
-    HALF_COST = 5000000
-    INTER_COST = 1500000
-    GAP_PENALTY_PER_CREDIT = 800000
-
     while total_credits_local < total_credits_required and max_iterations > 0:
         max_iterations -= 1
 
         base_capacity = _credits_per_semester.get(min(current_sem, 10), 0)
         opts = semester_options.get(current_sem, {}) if semester_options else {}
-        # capacidad sin contar extra_credits (se aplicará si user lo setea)
-        if opts.get("is_half_time"):
-            capacity = max(0, base_capacity // 2 - 1)
-        else:
-            capacity = base_capacity
-        capacity += int(opts.get("extra_credits", 0)) if opts else 0
-        capacity = max(0, capacity)
+        # invariantes del semestre: se calculan una vez y las comparten todas las configuraciones
+        extra_credits = int(opts.get("extra_credits", 0)) if opts else 0
 
-        available_subjects = get_available_subjects(_G, tuple(approved_local), current_sem)
-        intersemestral_options = get_intersemestral_options(_G, tuple(approved_local))
+        available_subjects = list(_available_subjects_cached(_G, approved_local_mask, current_sem))
+        intersemestral_options = _intersemestral_options_cached(_G, approved_local_mask)
+        # las dos intersemestrales de mayor crédito (candidatas en cada configuración)
+        # (reverse=True conserva el orden original entre empates, igual que la clave negada)
+        top_intersemestral = sorted(intersemestral_options, key=credits_map.__getitem__, reverse=True)[:2]
 
         best_sem_config = None
         # tupla: (gap, est_semesters, cost)
@@ -446,7 +564,7 @@ def generate_full_plan(
                 cap_tmp = max(0, base_capacity // 2 - 1)
             else:
                 cap_tmp = base_capacity
-            cap_tmp += int(opts.get("extra_credits", 0)) if opts else 0
+            cap_tmp += extra_credits
 
             subjects_selected, credits_selected = greedy_select_with_lookahead(
                 _G, approved_local, available_subjects, current_sem, cap_tmp, lookahead=lookahead, favor_fill=True
@@ -457,29 +575,30 @@ def generate_full_plan(
             credits_packed = credits_selected
             remaining_tmp = cap_tmp - credits_packed
             if remaining_tmp > 0:
-                subjects_packed, added = _pack_additional_courses(_G, set(approved_local), subjects_packed, available_subjects, remaining_tmp, current_sem)
+                subjects_packed, added = _pack_additional_courses(_G, approved_local, subjects_packed, available_subjects, remaining_tmp, current_sem)
                 credits_packed += added
 
-            temp_approved_no_inter = set(approved_local) | set(subjects_packed)
+            # subjects_packed es disjunto de approved_local (sólo materias disponibles no aprobadas)
+            credits_no_inter = approved_local_credits + sum(credits_map[c] for c in subjects_packed)
             remaining_no_inter = _estimate_remaining_semesters_simulation(
-                _G, temp_approved_no_inter, total_credits_required, _credits_per_semester, semester_options, current_sem + 1
+                credits_no_inter, total_credits_required, _credits_per_semester, semester_options, current_sem + 1
             )
             est_semesters_no_inter = 1 + remaining_no_inter
 
             inter_candidates = [None]
-            if allow_inter and intersemestral_options:
-                inter_candidates.extend(sorted(intersemestral_options, key=lambda s: -_G.nodes[s].get('credits', 0))[:2])
+            if allow_inter and top_intersemestral:
+                inter_candidates.extend(top_intersemestral)
 
             results = []
             for inter_choice in inter_candidates:
-                inter_credits = _G.nodes[inter_choice].get('credits', 0) if inter_choice else 0
+                inter_credits = credits_map[inter_choice] if inter_choice else 0
                 # NOTA: intersemestral NO consume capacidad: por eso NO verificamos credits_packed + inter_credits <= cap_tmp
 
                 # regla: solo considerar intersemestral si reduce número total de semestres
                 if inter_choice:
-                    temp_approved_with_inter = set(approved_local) | set(subjects_packed) | {inter_choice}
+                    credits_with_inter = credits_no_inter + (inter_credits if inter_choice not in subjects_packed else 0)
                     remaining_with_inter = _estimate_remaining_semesters_simulation(
-                        _G, temp_approved_with_inter, total_credits_required, _credits_per_semester, semester_options, current_sem + 1
+                        credits_with_inter, total_credits_required, _credits_per_semester, semester_options, current_sem + 1
                     )
                     est_semesters_with_inter = 1 + remaining_with_inter
                     if est_semesters_with_inter >= est_semesters_no_inter:
@@ -569,7 +688,7 @@ def generate_full_plan(
         cap_chosen = best_sem_config['capacity']
         remaining_final = cap_chosen - chosen_credits
         if remaining_final > 0:
-            chosen_subjects, added_final = _pack_additional_courses(_G, set(approved_local), chosen_subjects, available_subjects, remaining_final, current_sem)
+            chosen_subjects, added_final = _pack_additional_courses(_G, approved_local, chosen_subjects, available_subjects, remaining_final, current_sem)
             chosen_credits += added_final
             gap_after = cap_chosen - chosen_credits
             if gap_after < 0:
@@ -598,17 +717,19 @@ def generate_full_plan(
         })
 
         # actualizar aprobadas y crédito total: aquí SÍ sumamos intersemestral a aprobados/avance
-        approved_local.extend(best_sem_config['subjects'])
+        newly_approved = set(best_sem_config['subjects'])
         if best_sem_config['intersemestral']:
-            approved_local.append(best_sem_config['intersemestral'])
+            newly_approved.add(best_sem_config['intersemestral'])
+        newly_approved -= approved_local
+        approved_local_credits += sum(credits_map[c] for c in newly_approved)
+        approved_local_mask |= _approved_mask(_G, newly_approved)
+        approved_local |= newly_approved
         total_credits_local += best_sem_config['credits'] + best_sem_config.get('intersemestral_credits', 0)
         total_cost += sem_cost
 
         # avanzar semestre en función de créditos totales
         current_sem = _calculate_semester(total_credits_local)
 
-        gc.collect()
-
     return plan, total_cost
 
 # Fin de archivo